@@ -8,7 +8,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from app import create_app
-from models import db, University, Professor
+from models import db, University, upsert_universities, upsert_professors
 from services.scraper import UniversityScraper, ProfessorScraper
 
 
@@ -31,22 +31,7 @@ def scrape_universities(country, limit):
             scraper = UniversityScraper()
             universities_data = scraper.scrape_universities(country=country, limit=limit)
 
-            saved_count = 0
-            for uni_data in universities_data:
-                existing = University.query.filter_by(
-                    name=uni_data['name'],
-                    country=uni_data['country']
-                ).first()
-
-                if existing:
-                    for key, value in uni_data.items():
-                        setattr(existing, key, value)
-                else:
-                    university = University(**uni_data)
-                    db.session.add(university)
-
-                saved_count += 1
-
+            saved_count = upsert_universities(universities_data)
             db.session.commit()
 
             click.echo(click.style(f'✓ Successfully scraped {saved_count} universities!', fg='green'))
@@ -82,22 +67,7 @@ def scrape_professors(university, limit):
                 limit=limit
             )
 
-            saved_count = 0
-            for prof_data in professors_data:
-                existing = Professor.query.filter_by(
-                    university_id=uni.id,
-                    email=prof_data['email']
-                ).first()
-
-                if existing:
-                    for key, value in prof_data.items():
-                        setattr(existing, key, value)
-                else:
-                    professor = Professor(**prof_data)
-                    db.session.add(professor)
-
-                saved_count += 1
-
+            saved_count = upsert_professors(uni.id, professors_data)
             db.session.commit()
 
             click.echo(click.style(f'✓ Successfully scraped {saved_count} professors!', fg='green'))
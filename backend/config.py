@@ -9,6 +9,9 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Backend directory, used to resolve relative file paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 class Config:
     """Base configuration class"""
@@ -28,6 +31,7 @@ class Config:
 
     # Gemini AI
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')  # Must support JSON mode and system instructions
 
     # Email
     SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
@@ -36,6 +40,8 @@ class Config:
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
     EMAIL_FROM_NAME = os.getenv('EMAIL_FROM_NAME', 'PhD Applicant')
     DAILY_EMAIL_LIMIT = int(os.getenv('DAILY_EMAIL_LIMIT', 10000))
+    EMAIL_CACHE_PATH = os.path.join(BASE_DIR, os.getenv('EMAIL_CACHE_PATH', 'email_cache.db'))
+    EMAIL_CACHE_TTL = int(os.getenv('EMAIL_CACHE_TTL', 7 * 24 * 3600))
 
     # Redis & Celery
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -7,9 +7,12 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 from .user import User
-from .university import University
-from .professor import Professor
+from .university import University, upsert_universities
+from .professor import Professor, upsert_professors
 from .application import Application
 from .email import Email, EmailBatch
 
-__all__ = ['db', 'User', 'University', 'Professor', 'Application', 'Email', 'EmailBatch']
+__all__ = [
+    'db', 'User', 'University', 'Professor', 'Application', 'Email', 'EmailBatch',
+    'upsert_universities', 'upsert_professors'
+]
@@ -46,10 +46,14 @@ class Email(db.Model):
     """Email model for storing draft and sent emails"""
 
     __tablename__ = 'emails'
+    __table_args__ = (
+        # Serves batch lookups filtered by status (also covers batch_id alone)
+        db.Index('ix_email_batch_status', 'batch_id', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     application_id = db.Column(db.Integer, db.ForeignKey('applications.id'), nullable=False, index=True)
-    batch_id = db.Column(db.Integer, db.ForeignKey('email_batches.id'), index=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('email_batches.id'))
 
     subject = db.Column(db.String(500), nullable=False)
     body = db.Column(db.Text, nullable=False)
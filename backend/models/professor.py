@@ -3,6 +3,7 @@ Professor Model
 Stores professor profiles and research information
 """
 from datetime import datetime
+from typing import Dict, List
 from models import db
 
 
@@ -53,3 +54,33 @@ class Professor(db.Model):
 
     def __repr__(self) -> str:
         return f'<Professor {self.name}>'
+
+
+def upsert_professors(university_id: int, rows: List[Dict]) -> int:
+    """
+    Save scraped professors for a university, updating existing ones matched by email
+    Existing rows are looked up in one query, then saved with bulk
+    update/insert; an email repeated in rows keeps its last record.
+    The caller commits.
+    Args:
+        university_id: University the professors belong to
+        rows: Professor dictionaries from ProfessorScraper
+    Returns:
+        Number of rows saved
+    """
+    by_email = {row['email']: row for row in rows}
+    existing_ids = dict(
+        db.session.query(Professor.email, Professor.id)
+        .filter(Professor.university_id == university_id, Professor.email.in_(by_email))
+        .all()
+    )
+
+    db.session.bulk_update_mappings(Professor, [
+        dict(row, id=existing_ids[email])
+        for email, row in by_email.items() if email in existing_ids
+    ])
+    db.session.bulk_insert_mappings(Professor, [
+        row for email, row in by_email.items() if email not in existing_ids
+    ])
+
+    return len(rows)
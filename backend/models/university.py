@@ -3,6 +3,7 @@ University Model
 Stores university information from scraping
 """
 from datetime import datetime
+from typing import Dict, List
 from models import db
 
 
@@ -53,3 +54,33 @@ class University(db.Model):
 
     def __repr__(self) -> str:
         return f'<University {self.name} ({self.country})>'
+
+
+def upsert_universities(rows: List[Dict]) -> int:
+    """
+    Save scraped universities, updating existing ones matched by name and country
+    Existing rows are looked up in one query, then saved with bulk
+    update/insert; a university repeated in rows keeps its last record.
+    The caller commits.
+    Args:
+        rows: University dictionaries from UniversityScraper
+    Returns:
+        Number of rows saved
+    """
+    by_key = {(row['name'], row['country']): row for row in rows}
+    existing = (
+        db.session.query(University.name, University.country, University.id)
+        .filter(University.name.in_({name for name, _ in by_key}))
+        .all()
+    )
+    existing_ids = {(name, country): university_id for name, country, university_id in existing}
+
+    db.session.bulk_update_mappings(University, [
+        dict(row, id=existing_ids[key])
+        for key, row in by_key.items() if key in existing_ids
+    ])
+    db.session.bulk_insert_mappings(University, [
+        row for key, row in by_key.items() if key not in existing_ids
+    ])
+
+    return len(rows)
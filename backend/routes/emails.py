@@ -5,7 +5,7 @@ API endpoints for email generation and batch management
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Email, EmailBatch, Application, Professor, User
-from services.ai import GeminiService, EmailGenerator
+from services.ai import get_email_generator
 from services.email import BatchManager, SMTPService
 from config import Config
 import json
@@ -41,8 +41,12 @@ def generate_emails():
             return jsonify({'error': 'No professors found'}), 404
 
         # Initialize AI services
-        gemini = GeminiService(Config.GEMINI_API_KEY)
-        email_gen = EmailGenerator(gemini)
+        email_gen = get_email_generator(
+            Config.GEMINI_API_KEY,
+            Config.GEMINI_MODEL,
+            cache_path=Config.EMAIL_CACHE_PATH,
+            cache_ttl=Config.EMAIL_CACHE_TTL
+        )
 
         # Generate emails
         emails_data = []
@@ -4,9 +4,9 @@ API endpoints for professor discovery and management
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Professor, University, User
+from models import db, Professor, University, User, upsert_professors
 from services.scraper import ProfessorScraper
-from services.ai import GeminiService, MatchingEngine
+from services.ai import get_matching_engine
 from config import Config
 import json
 
@@ -50,23 +50,15 @@ def search_professors():
 
         # Calculate match scores if user has research interests
         if user and user.research_interests:
-            gemini = GeminiService(Config.GEMINI_API_KEY)
-            matcher = MatchingEngine(gemini)
+            matcher = get_matching_engine(Config.GEMINI_API_KEY, Config.GEMINI_MODEL)
 
-            for prof in professors:
-                score = matcher.calculate_match_score(
-                    user.research_interests,
-                    prof.get('research_interests', '[]')
-                )
-                prof['match_score'] = score
+            # Score all professors concurrently (sorted by match score)
+            professors = matcher.batch_match_professors(user.research_interests, professors)
 
             # Filter by minimum match score if specified
             if min_match_score:
                 professors = [p for p in professors if p.get('match_score', 0) >= min_match_score]
 
-            # Sort by match score
-            professors.sort(key=lambda x: x.get('match_score', 0), reverse=True)
-
         return jsonify({
             'professors': professors,
             'total': pagination.total,
@@ -110,25 +102,7 @@ def discover_professors():
         )
 
         # Save to database
-        saved_count = 0
-        for prof_data in professors_data:
-            # Check if exists
-            existing = Professor.query.filter_by(
-                university_id=university_id,
-                email=prof_data['email']
-            ).first()
-
-            if existing:
-                # Update existing
-                for key, value in prof_data.items():
-                    setattr(existing, key, value)
-            else:
-                # Create new
-                professor = Professor(**prof_data)
-                db.session.add(professor)
-
-            saved_count += 1
-
+        saved_count = upsert_professors(university_id, professors_data)
         db.session.commit()
 
         return jsonify({
@@ -4,7 +4,7 @@ API endpoints for university discovery and management
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, University
+from models import db, University, upsert_universities
 from services.scraper import UniversityScraper
 import json
 
@@ -74,25 +74,7 @@ def discover_universities():
         universities_data = scraper.scrape_universities(country=country, limit=limit)
 
         # Save to database
-        saved_count = 0
-        for uni_data in universities_data:
-            # Check if exists
-            existing = University.query.filter_by(
-                name=uni_data['name'],
-                country=uni_data['country']
-            ).first()
-
-            if existing:
-                # Update existing
-                for key, value in uni_data.items():
-                    setattr(existing, key, value)
-            else:
-                # Create new
-                university = University(**uni_data)
-                db.session.add(university)
-
-            saved_count += 1
-
+        saved_count = upsert_universities(universities_data)
         db.session.commit()
 
         return jsonify({
@@ -133,8 +115,7 @@ def get_countries():
         db_countries = [c[0] for c in db_countries]
 
         # Combine and deduplicate
-        all_countries = list(set(countries + db_countries))
-        all_countries.sort()
+        all_countries = sorted(set(countries).union(db_countries))
 
         return jsonify({'countries': all_countries}), 200
 
@@ -2,8 +2,9 @@
 AI Services Package
 Gemini AI integration for matching and email generation
 """
-from .gemini_service import GeminiService
-from .matching_engine import MatchingEngine
-from .email_generator import EmailGenerator
+from .gemini_service import GeminiService, get_gemini_service
+from .matching_engine import MatchingEngine, get_matching_engine
+from .email_generator import EmailGenerator, get_email_generator
 
-__all__ = ['GeminiService', 'MatchingEngine', 'EmailGenerator']
+__all__ = ['GeminiService', 'MatchingEngine', 'EmailGenerator', 'get_gemini_service', 'get_matching_engine',
+           'get_email_generator']
@@ -2,25 +2,80 @@
 Email Generator
 Generates personalized emails using Gemini AI
 """
-import json
+import functools
+import hashlib
 import logging
+import orjson
+import sqlite3
+import threading
+import time
 from typing import Dict, Optional
-from .gemini_service import GeminiService
+from google.genai import types
+from .gemini_service import GeminiService, get_gemini_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_DEFAULT_SUBJECT = 'PhD Application - Research Opportunity'
+
+# Static instructions sent as the system instruction, so every request
+# shares an identical prefix and only the per-professor fields vary
+# (requires a model with system instruction support, see Config.GEMINI_MODEL)
+_EMAIL_INSTRUCTIONS = """
+Generate a professional PhD application email to a professor.
+
+Requirements:
+1. Subject line: Concise and professional
+2. Email body: 200-300 words
+3. Mention specific research alignment with professor's work
+4. Express genuine interest in their research
+5. Briefly mention relevant background
+6. Request consideration for PhD position
+7. Professional and respectful tone
+8. Mention CV is attached
+
+Return the subject line as "subject" and the email body as "body".
+"""
+
+# Structured (JSON-mode) output for generated emails
+_EMAIL_CONFIG = types.GenerateContentConfig(
+    system_instruction=_EMAIL_INSTRUCTIONS,
+    response_mime_type='application/json',
+    response_schema={
+        'type': 'OBJECT',
+        'properties': {
+            'subject': {'type': 'STRING'},
+            'body': {'type': 'STRING'}
+        },
+        'required': ['subject', 'body']
+    }
+)
+
 
 class EmailGenerator:
     """Generates personalized PhD application emails"""
 
-    def __init__(self, gemini_service: GeminiService):
+    # Seconds to wait for a locked cache database before skipping the cache
+    CACHE_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        gemini_service: GeminiService,
+        cache_path: Optional[str] = None,
+        cache_ttl: int = 7 * 24 * 3600
+    ):
         """
         Initialize email generator
         Args:
             gemini_service: Configured GeminiService instance
+            cache_path: SQLite file for caching generated emails (disabled if None)
+            cache_ttl: Seconds a cached email stays valid
         """
         self.gemini = gemini_service
+        self.cache_ttl = cache_ttl
+        self._cache_path = cache_path
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
 
     def generate_email(
         self,
@@ -46,11 +101,19 @@ class EmailGenerator:
         try:
             # Parse professor research if JSON
             if isinstance(professor_research, str) and professor_research.startswith('['):
-                research_list = json.loads(professor_research)
+                research_list = orjson.loads(professor_research)
                 professor_research = ', '.join(research_list)
 
+            cache_key = self._cache_key(
+                professor_name, professor_research, university_name,
+                user_name, user_research, user_background
+            )
+            cached = self._cache_get(cache_key)
+            if cached:
+                return cached
+
             prompt = f"""
-Generate a professional PhD application email to a professor.
+Write the PhD application email for:
 
 Professor: {professor_name}
 University: {university_name}
@@ -59,30 +122,17 @@ Professor's Research: {professor_research}
 Applicant: {user_name}
 Applicant Background: {user_background}
 Applicant Research Interests: {user_research}
-
-Requirements:
-1. Subject line: Concise and professional
-2. Email body: 200-300 words
-3. Mention specific research alignment with professor's work
-4. Express genuine interest in their research
-5. Briefly mention relevant background
-6. Request consideration for PhD position
-7. Professional and respectful tone
-8. Mention CV is attached
-
-Format:
-SUBJECT: [subject line]
-
-BODY:
-[email body]
-
-Generate the email now.
 """
 
-            response = self.gemini.generate_content(prompt)
+            response = self.gemini.generate_content(prompt, config=_EMAIL_CONFIG)
 
             if response:
-                return self._parse_email_response(response)
+                # Only cache emails that decoded; fallbacks are retried next time
+                email = self._decode_email_response(response)
+                if email:
+                    self._cache_put(cache_key, email)
+                    return email
+                return {'subject': _DEFAULT_SUBJECT, 'body': response}
             else:
                 # Fallback to template
                 return self._generate_template_email(
@@ -103,32 +153,82 @@ Generate the email now.
                 user_research
             )
 
-    def _parse_email_response(self, response: str) -> Dict[str, str]:
-        """Parse Gemini email response"""
-        try:
-            parts = response.split('BODY:', 1)
-
-            subject = 'PhD Application - Research Opportunity'
-            body = response
+    def _cache_key(self, *fields: str) -> str:
+        """Hash the model and email inputs into a cache key"""
+        return hashlib.blake2b('|'.join((self.gemini.model,) + fields).encode(), digest_size=32).hexdigest()
+
+    def _cache_connection(self) -> Optional[sqlite3.Connection]:
+        """Open the cache database on first use (caller holds _cache_lock)"""
+        if self._cache_db is None and self._cache_path:
+            try:
+                db = sqlite3.connect(self._cache_path, timeout=self.CACHE_TIMEOUT, check_same_thread=False)
+                db.execute(
+                    'CREATE TABLE IF NOT EXISTS emails '
+                    '(key TEXT PRIMARY KEY, subject TEXT, body TEXT, created_ts REAL)'
+                )
+                db.commit()
+                self._cache_db = db
+            except sqlite3.Error as e:
+                # Don't retry on every email; run uncached from now on
+                logger.error(f"Email cache unavailable, continuing without it: {str(e)}")
+                self._cache_path = None
+        return self._cache_db
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, str]]:
+        """Return a cached email younger than cache_ttl, if any"""
+        with self._cache_lock:
+            db = self._cache_connection()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    'SELECT subject, body FROM emails WHERE key = ? AND created_ts > ?',
+                    (key, time.time() - self.cache_ttl)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Error reading email cache: {str(e)}")
+                return None
+
+        if row:
+            return {'subject': row[0], 'body': row[1]}
+        return None
+
+    def _cache_put(self, key: str, email: Dict[str, str]) -> None:
+        """Store a generated email"""
+        with self._cache_lock:
+            db = self._cache_connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    'INSERT OR REPLACE INTO emails (key, subject, body, created_ts) VALUES (?, ?, ?, ?)',
+                    (key, email['subject'], email['body'], time.time())
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing email cache: {str(e)}")
+                db.rollback()
 
-            if len(parts) == 2:
-                subject_part = parts[0].replace('SUBJECT:', '').strip()
-                if subject_part:
-                    subject = subject_part
+    def _parse_email_response(self, response: str) -> Dict[str, str]:
+        """Parse Gemini JSON email response, using the raw text as body if it does not decode"""
+        return self._decode_email_response(response) or {
+            'subject': _DEFAULT_SUBJECT,
+            'body': response
+        }
 
-                body = parts[1].strip()
+    def _decode_email_response(self, response: str) -> Optional[Dict[str, str]]:
+        """Decode a Gemini JSON email response, or return None if it is malformed"""
+        try:
+            data = orjson.loads(response)
 
             return {
-                'subject': subject,
-                'body': body
+                'subject': (data.get('subject') or '').strip() or _DEFAULT_SUBJECT,
+                'body': data['body'].strip()
             }
 
         except Exception as e:
             logger.error(f"Error parsing email response: {str(e)}")
-            return {
-                'subject': 'PhD Application - Research Opportunity',
-                'body': response
-            }
+            return None
 
     def _generate_template_email(
         self,
@@ -197,3 +297,24 @@ Best regards,
 
         logger.info(f"Generated {len(results)} emails")
         return results
+
+
+@functools.lru_cache(maxsize=None)
+def get_email_generator(
+    api_key: str,
+    model: str = GeminiService.DEFAULT_MODEL,
+    cache_path: Optional[str] = None,
+    cache_ttl: int = 7 * 24 * 3600
+) -> EmailGenerator:
+    """
+    Get the shared EmailGenerator for an API key, model and cache
+    Args:
+        api_key: Google Gemini API key
+        model: Gemini model name
+        cache_path: SQLite file for caching generated emails (disabled if None)
+        cache_ttl: Seconds a cached email stays valid
+    Returns:
+        Cached EmailGenerator backed by the shared GeminiService, so the
+        cache database is opened once per process rather than per request
+    """
+    return EmailGenerator(get_gemini_service(api_key, model), cache_path=cache_path, cache_ttl=cache_ttl)
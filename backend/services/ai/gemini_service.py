@@ -2,51 +2,241 @@
 Gemini AI Service
 Core integration with Google Gemini API
 """
-import google.generativeai as genai
+from google import genai
+from google.genai import errors, types
+import httpx
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict
+import orjson
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Iterator, List, Tuple
 import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Structured (JSON-mode) output for research match analysis
+_MATCH_CONFIG = types.GenerateContentConfig(
+    response_mime_type='application/json',
+    response_schema={
+        'type': 'OBJECT',
+        'properties': {
+            'score': {'type': 'INTEGER'},
+            'matching_areas': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+            'opportunities': {'type': 'STRING'},
+            'explanation': {'type': 'STRING'}
+        },
+        'required': ['score', 'matching_areas', 'opportunities', 'explanation']
+    }
+)
+
+# Structured output for analyzing several professors in one request
+_BATCH_MATCH_CONFIG = types.GenerateContentConfig(
+    response_mime_type='application/json',
+    response_schema={
+        'type': 'ARRAY',
+        'items': {
+            'type': 'OBJECT',
+            'properties': {
+                'index': {'type': 'INTEGER'},
+                **_MATCH_CONFIG.response_schema['properties']
+            },
+            'required': ['index', 'score', 'matching_areas', 'opportunities', 'explanation']
+        }
+    }
+)
+
+
+class TokenBucket:
+    """Token bucket rate limiter allowing bursts of up to max_rate requests"""
+
+    def __init__(self, max_rate: float, time_period: float = 60):
+        """
+        Initialize token bucket
+        Args:
+            max_rate: Requests allowed per time period (also the burst size)
+            time_period: Length of the rate window (seconds)
+        """
+        self.capacity = float(max_rate)
+        self.fill_rate = max_rate / time_period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """
+        Take a token if one is available
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.fill_rate
+
+    def acquire(self) -> None:
+        """Block the calling thread until a token is available"""
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a token is available"""
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
 
 class GeminiService:
     """Service for interacting with Google Gemini AI"""
 
-    def __init__(self, api_key: str):
+    # Circuit breaker (per instance, i.e. per API key): after BREAKER_THRESHOLD
+    # consecutive transient failures, skip API calls for BREAKER_COOLDOWN seconds
+    BREAKER_THRESHOLD = 5
+    BREAKER_COOLDOWN = 30
+
+    # Failures worth retrying and counting towards the breaker; anything else
+    # (bad API key, invalid request) would fail the same way again
+    TRANSIENT_ERRORS = (
+        errors.ServerError,
+        httpx.TransportError,
+        ConnectionError,
+        TimeoutError,
+        asyncio.TimeoutError
+    )
+    TRANSIENT_STATUS_CODES = (408, 429)
+
+    # Default model; JSON-mode response schemas and system instructions
+    # are not supported by gemini-pro (1.0)
+    DEFAULT_MODEL = 'gemini-2.5-flash'
+
+    # Maximum number of prompt responses kept in the in-memory cache
+    CACHE_SIZE = 1024
+
+    # HTTP connections kept open per client, so concurrent requests reuse
+    # warm TLS connections instead of handshaking per call
+    MAX_CONNECTIONS = 50
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, requests_per_minute: int = 60):
         """
         Initialize Gemini service
         Args:
             api_key: Google Gemini API key
+            model: Gemini model name
+            requests_per_minute: API request quota shared by all calls
         """
         self.api_key = api_key
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self.model = model
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.limiter = TokenBucket(requests_per_minute, 60)
         self.retry_count = 3
         self.retry_delay = 2
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._breaker_lock = threading.Lock()
+        self._failure_count = 0
+        self._open_until = 0.0
+
+    @property
+    def client(self) -> genai.Client:
+        """Per-instance Gemini client (pooled connections), created once on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    limits = httpx.Limits(
+                        max_connections=self.MAX_CONNECTIONS,
+                        max_keepalive_connections=self.MAX_CONNECTIONS
+                    )
+                    self._client = genai.Client(
+                        api_key=self.api_key,
+                        http_options=types.HttpOptions(
+                            client_args={'limits': limits},
+                            async_client_args={'limits': limits}
+                        )
+                    )
+        return self._client
 
-    def generate_content(self, prompt: str, max_retries: Optional[int] = None) -> Optional[str]:
+    def run(self, coro):
+        """
+        Run a coroutine to completion on this service's background event loop
+        The async client's pooled connections belong to the event loop that
+        opened them, so sync callers share one long-lived loop instead of
+        starting a new one (via asyncio.run) per call.
+        Args:
+            coro: Coroutine using this service's async methods
+        Returns:
+            The coroutine's result
+        """
+        if self._loop is None:
+            with self._client_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='gemini-event-loop', daemon=True).start()
+                    self._loop = loop
+
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def generate_content(
+        self,
+        prompt: str,
+        max_retries: Optional[int] = None,
+        config: Optional[types.GenerateContentConfig] = None
+    ) -> Optional[str]:
         """
         Generate content using Gemini
         Args:
             prompt: Input prompt
             max_retries: Maximum number of retries (default: 3)
+            config: Generation config (e.g. JSON-mode response schema)
         Returns:
             Generated text or None on failure
         """
         retries = max_retries if max_retries is not None else self.retry_count
 
+        cache_key = self._cache_key(prompt, config)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        if self._circuit_open():
+            logger.warning("Gemini circuit breaker open, skipping API call")
+            return None
+
         for attempt in range(retries):
             try:
+                self.limiter.acquire()
                 logger.info(f"Generating content with Gemini (attempt {attempt + 1}/{retries})")
-                response = self.model.generate_content(prompt)
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=prompt,
+                    config=config
+                )
 
                 if response and response.text:
+                    self._record_success()
+                    self._cache_put(cache_key, response.text)
                     return response.text
 
             except Exception as e:
                 logger.error(f"Gemini API error (attempt {attempt + 1}): {str(e)}")
+                if not self._is_transient(e):
+                    break
+                if self._record_failure():
+                    logger.error(f"Gemini circuit breaker opened for {self.BREAKER_COOLDOWN}s")
+                    break
                 if attempt < retries - 1:
                     time.sleep(self.retry_delay * (attempt + 1))
                 else:
@@ -54,6 +244,186 @@ class GeminiService:
 
         return None
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        max_retries: Optional[int] = None,
+        config: Optional[types.GenerateContentConfig] = None
+    ) -> Optional[str]:
+        """
+        Generate content using Gemini's async client (non-blocking)
+        Args:
+            prompt: Input prompt
+            max_retries: Maximum number of retries (default: 3)
+            config: Generation config (e.g. JSON-mode response schema)
+        Returns:
+            Generated text or None on failure
+        """
+        retries = max_retries if max_retries is not None else self.retry_count
+
+        cache_key = self._cache_key(prompt, config)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        if self._circuit_open():
+            logger.warning("Gemini circuit breaker open, skipping API call")
+            return None
+
+        for attempt in range(retries):
+            try:
+                await self.limiter.aacquire()
+                logger.info(f"Generating content with Gemini async (attempt {attempt + 1}/{retries})")
+                response = await self.client.aio.models.generate_content(
+                    model=self.model,
+                    contents=prompt,
+                    config=config
+                )
+
+                if response and response.text:
+                    self._record_success()
+                    self._cache_put(cache_key, response.text)
+                    return response.text
+
+            except Exception as e:
+                logger.error(f"Gemini API error (attempt {attempt + 1}): {str(e)}")
+                if not self._is_transient(e):
+                    break
+                if self._record_failure():
+                    logger.error(f"Gemini circuit breaker opened for {self.BREAKER_COOLDOWN}s")
+                    break
+                if attempt < retries - 1:
+                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                else:
+                    logger.error("Max retries reached for Gemini API")
+
+        return None
+
+    def _cache_key(self, prompt: str, config: Optional[types.GenerateContentConfig]) -> str:
+        """Hash the model, generation config and prompt into a cache key"""
+        digest = hashlib.blake2b(self.model.encode(), digest_size=32)
+        if config is not None:
+            digest.update(config.model_dump_json(exclude_none=True).encode())
+        digest.update(prompt.encode())
+        return digest.hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Return a cached response, marking it most recently used"""
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def _cache_put(self, key: str, text: str) -> None:
+        """Store a response, evicting the least recently used beyond CACHE_SIZE"""
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _is_transient(self, error: Exception) -> bool:
+        """Check whether an API error is temporary (network, timeout, 429 or 5xx)"""
+        if isinstance(error, errors.ClientError):
+            return error.code in self.TRANSIENT_STATUS_CODES
+        return isinstance(error, self.TRANSIENT_ERRORS)
+
+    def _circuit_open(self) -> bool:
+        """Check whether API calls are currently being short-circuited"""
+        return time.monotonic() < self._open_until
+
+    def _record_success(self) -> None:
+        """Reset the consecutive failure count"""
+        with self._breaker_lock:
+            self._failure_count = 0
+
+    def _record_failure(self) -> bool:
+        """
+        Count a transient API failure
+        Returns:
+            True if this failure opened the circuit
+        """
+        with self._breaker_lock:
+            self._failure_count += 1
+            if self._failure_count < self.BREAKER_THRESHOLD:
+                return False
+            self._failure_count = 0
+            self._open_until = time.monotonic() + self.BREAKER_COOLDOWN
+            return True
+
+    def generate_content_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Generate content using Gemini, yielding text as it arrives
+        Args:
+            prompt: Input prompt
+        Yields:
+            Partial text chunks in generation order (nothing if the
+            circuit breaker is open)
+        Raises:
+            Exception: The API error if the stream fails, so a partial
+            response is never mistaken for a complete one
+        """
+        if self._circuit_open():
+            logger.warning("Gemini circuit breaker open, skipping API call")
+            return
+
+        try:
+            self.limiter.acquire()
+            logger.info("Streaming content with Gemini")
+            response = self.client.models.generate_content_stream(model=self.model, contents=prompt)
+
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+            self._record_success()
+
+        except Exception as e:
+            logger.error(f"Gemini API streaming error: {str(e)}")
+            # Chunks already yielded can't be taken back, so there is no
+            # retry here; count the failure and let the caller decide
+            if self._is_transient(e) and self._record_failure():
+                logger.error(f"Gemini circuit breaker opened for {self.BREAKER_COOLDOWN}s")
+            raise
+
+    async def abulk_generate(
+        self,
+        prompts: List[str],
+        concurrency: int = 8
+    ) -> List[Optional[str]]:
+        """
+        Generate content for many prompts concurrently within the request quota
+        Args:
+            prompts: Input prompts
+            concurrency: Maximum requests in flight at once
+        Returns:
+            Generated texts in prompt order (None where generation failed)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def dispatch(prompt: str) -> Optional[str]:
+            async with semaphore:
+                return await self.agenerate_content(prompt)
+
+        logger.info(f"Bulk generating {len(prompts)} prompts")
+        return await asyncio.gather(*(dispatch(prompt) for prompt in prompts))
+
+    def bulk_generate(
+        self,
+        prompts: List[str],
+        concurrency: int = 8
+    ) -> List[Optional[str]]:
+        """
+        Synchronous wrapper around abulk_generate
+        Args:
+            prompts: Input prompts
+            concurrency: Maximum requests in flight at once
+        Returns:
+            Generated texts in prompt order (None where generation failed)
+        """
+        return self.run(self.abulk_generate(prompts, concurrency=concurrency))
+
     def analyze_research_match(self, user_interests: str, professor_interests: str) -> Dict:
         """
         Analyze research compatibility between user and professor
@@ -63,7 +433,46 @@ class GeminiService:
         Returns:
             Dictionary with match score and analysis
         """
-        prompt = f"""
+        prompt = self._match_prompt(user_interests, professor_interests)
+
+        try:
+            response = self.generate_content(prompt, config=_MATCH_CONFIG)
+            if response:
+                return self._parse_match_response(response)
+            return self._default_match_score()
+
+        except Exception as e:
+            logger.error(f"Error analyzing research match: {str(e)}")
+            return self._default_match_score()
+
+    async def aanalyze_research_matches(
+        self,
+        user_interests: str,
+        professor_interests: List[str]
+    ) -> List[Dict]:
+        """
+        Analyze research compatibility with several professors in one request
+        Args:
+            user_interests: User's research interests (JSON string or text)
+            professor_interests: Each professor's research interests
+        Returns:
+            Match analysis dictionaries in professor order
+        """
+        prompt = self._batch_match_prompt(user_interests, professor_interests)
+
+        try:
+            response = await self.agenerate_content(prompt, config=_BATCH_MATCH_CONFIG)
+            if response:
+                return self._parse_batch_match_response(response, len(professor_interests))
+
+        except Exception as e:
+            logger.error(f"Error analyzing research matches: {str(e)}")
+
+        return [self._default_match_score() for _ in professor_interests]
+
+    def _match_prompt(self, user_interests: str, professor_interests: str) -> str:
+        """Build the research match analysis prompt"""
+        return f"""
 Analyze the research compatibility between a PhD applicant and a professor.
 
 Applicant's Research Interests:
@@ -73,64 +482,67 @@ Professor's Research Interests:
 {professor_interests}
 
 Provide:
-1. A compatibility score from 0-100 (where 100 is perfect match)
-2. Key matching areas
-3. Potential collaboration opportunities
-4. A brief explanation
-
-Format your response as:
-SCORE: [number]
-MATCHING_AREAS: [comma-separated list]
-OPPORTUNITIES: [brief description]
-EXPLANATION: [1-2 sentences]
+1. score: A compatibility score from 0-100 (where 100 is perfect match)
+2. matching_areas: Key matching areas
+3. opportunities: Potential collaboration opportunities (brief description)
+4. explanation: A brief explanation (1-2 sentences)
 """
 
-        try:
-            response = self.generate_content(prompt)
-            if response:
-                return self._parse_match_response(response)
-            return self._default_match_score()
+    def _batch_match_prompt(self, user_interests: str, professor_interests: List[str]) -> str:
+        """Build the prompt analyzing several professors at once"""
+        professors = '\n'.join(
+            f"[{index}] {interests}" for index, interests in enumerate(professor_interests)
+        )
+        return f"""
+Analyze the research compatibility between a PhD applicant and each professor below.
 
-        except Exception as e:
-            logger.error(f"Error analyzing research match: {str(e)}")
-            return self._default_match_score()
+Applicant's Research Interests:
+{user_interests}
+
+Professors' Research Interests (by index):
+{professors}
+
+For each professor, provide:
+1. index: The professor's index from the list above
+2. score: A compatibility score from 0-100 (where 100 is perfect match)
+3. matching_areas: Key matching areas
+4. opportunities: Potential collaboration opportunities (brief description)
+5. explanation: A brief explanation (1-2 sentences)
+"""
 
     def _parse_match_response(self, response: str) -> Dict:
-        """Parse Gemini response for match analysis"""
+        """Parse Gemini JSON response for match analysis"""
         try:
-            lines = response.strip().split('\n')
-            result = {
-                'score': 0,
-                'matching_areas': [],
-                'opportunities': '',
-                'explanation': ''
-            }
-
-            for line in lines:
-                if line.startswith('SCORE:'):
-                    score_str = line.replace('SCORE:', '').strip()
-                    # Extract number from string
-                    import re
-                    numbers = re.findall(r'\d+', score_str)
-                    if numbers:
-                        result['score'] = min(int(numbers[0]), 100)
-
-                elif line.startswith('MATCHING_AREAS:'):
-                    areas = line.replace('MATCHING_AREAS:', '').strip()
-                    result['matching_areas'] = [a.strip() for a in areas.split(',')]
-
-                elif line.startswith('OPPORTUNITIES:'):
-                    result['opportunities'] = line.replace('OPPORTUNITIES:', '').strip()
-
-                elif line.startswith('EXPLANATION:'):
-                    result['explanation'] = line.replace('EXPLANATION:', '').strip()
-
-            return result
+            return self._match_from_json(orjson.loads(response))
 
         except Exception as e:
             logger.error(f"Error parsing match response: {str(e)}")
             return self._default_match_score()
 
+    def _parse_batch_match_response(self, response: str, count: int) -> List[Dict]:
+        """Parse Gemini JSON array response for a batch of match analyses"""
+        results = [None] * count
+
+        try:
+            for item in orjson.loads(response):
+                index = int(item.get('index', -1))
+                if 0 <= index < count:
+                    results[index] = self._match_from_json(item)
+
+        except Exception as e:
+            logger.error(f"Error parsing batch match response: {str(e)}")
+
+        return [result or self._default_match_score() for result in results]
+
+    def _match_from_json(self, data: Dict) -> Dict:
+        """Normalize a decoded match analysis object"""
+        return {
+            'score': min(max(int(data.get('score', 0)), 0), 100),
+            'matching_areas': [str(area).strip() for area in data.get('matching_areas', [])],
+            'opportunities': str(data.get('opportunities', '')).strip(),
+            'explanation': str(data.get('explanation', '')).strip()
+        }
+
     def _default_match_score(self) -> Dict:
         """Return default match score when API fails"""
         return {
@@ -139,3 +551,26 @@ EXPLANATION: [1-2 sentences]
             'opportunities': 'Potential collaboration in engineering research',
             'explanation': 'Match analysis based on general compatibility'
         }
+
+
+# Shared GeminiService per API key and model, so all callers share one
+# client, rate limiter, response cache and circuit breaker
+_services: Dict[Tuple[str, str], GeminiService] = {}
+_services_lock = threading.Lock()
+
+
+def get_gemini_service(api_key: str, model: str = GeminiService.DEFAULT_MODEL) -> GeminiService:
+    """
+    Get the shared GeminiService for an API key and model
+    Args:
+        api_key: Google Gemini API key
+        model: Gemini model name
+    Returns:
+        GeminiService instance, created once even when first requested
+        from several threads at the same time
+    """
+    with _services_lock:
+        service = _services.get((api_key, model))
+        if service is None:
+            service = _services[(api_key, model)] = GeminiService(api_key, model=model)
+        return service
@@ -2,15 +2,32 @@
 Matching Engine
 Calculates compatibility between users and professors
 """
-import json
+import asyncio
+import functools
+import heapq
 import logging
-from typing import Dict, List
-from .gemini_service import GeminiService
+import orjson
+from typing import Dict, FrozenSet, List, Optional
+from .gemini_service import GeminiService, get_gemini_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4096)
+def _interest_keywords(interests: str) -> FrozenSet[str]:
+    """
+    Parse research interests into a keyword set (memoized per interests string)
+    Args:
+        interests: JSON list of interests or free text
+    Returns:
+        Frozen set of keywords
+    """
+    if interests.startswith('['):
+        return frozenset(orjson.loads(interests))
+    return frozenset(interests.lower().split())
+
+
 class MatchingEngine:
     """Calculates match scores between applicants and professors"""
 
@@ -51,52 +68,135 @@ class MatchingEngine:
             Match score (0-100)
         """
         try:
-            # Parse JSON if needed
-            if isinstance(user_interests, str) and user_interests.startswith('['):
-                user_keywords = set(json.loads(user_interests))
-            else:
-                user_keywords = set(user_interests.lower().split())
-
-            if isinstance(professor_interests, str) and professor_interests.startswith('['):
-                prof_keywords = set(json.loads(professor_interests))
-            else:
-                prof_keywords = set(professor_interests.lower().split())
+            user_keywords = _interest_keywords(user_interests)
+            prof_keywords = _interest_keywords(professor_interests)
 
             # Calculate Jaccard similarity
             if not user_keywords or not prof_keywords:
                 return 50.0
 
-            intersection = user_keywords.intersection(prof_keywords)
-            union = user_keywords.union(prof_keywords)
+            if user_keywords.isdisjoint(prof_keywords):
+                return 0.0
 
-            if not union:
-                return 50.0
+            # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union set is never built
+            intersection = len(user_keywords & prof_keywords)
+            union = len(user_keywords) + len(prof_keywords) - intersection
 
-            score = (len(intersection) / len(union)) * 100
+            score = (intersection / union) * 100
             return min(max(score, 0), 100)  # Clamp between 0-100
 
         except Exception as e:
             logger.error(f"Error in keyword matching: {str(e)}")
             return 50.0
 
-    def batch_match_professors(self, user_interests: str, professors: List[Dict]) -> List[Dict]:
+    async def abatch_match_professors(
+        self,
+        user_interests: str,
+        professors: List[Dict],
+        concurrency: int = 8,
+        batch_size: int = 10,
+        rerank_top_k: Optional[int] = None,
+        top_k: Optional[int] = None
+    ) -> List[Dict]:
         """
-        Calculate match scores for multiple professors
+        Calculate match scores for multiple professors concurrently
         Args:
             user_interests: User's research interests
             professors: List of professor dictionaries
+            concurrency: Maximum Gemini requests in flight at once
+            batch_size: Professors analyzed per Gemini request
+            rerank_top_k: If set, score everyone by keywords and only
+                re-score the top K keyword matches with Gemini; the rest keep
+                their keyword score and rank below all re-scored professors
+            top_k: If set, return only the K best matches
         Returns:
-            Professors with added match_score field, sorted by score
+            Professors with added match_score (and, when analyzed by Gemini,
+            matching_areas, collaboration_opportunities and match_explanation)
+            fields, sorted by score
         """
         logger.info(f"Calculating match scores for {len(professors)} professors")
 
-        for professor in professors:
-            prof_interests = professor.get('research_interests', '[]')
-            score = self.calculate_match_score(user_interests, prof_interests)
-            professor['match_score'] = score
+        candidates = professors
+        if rerank_top_k is not None:
+            for professor in professors:
+                professor['match_score'] = self._keyword_match(
+                    user_interests,
+                    professor.get('research_interests', '[]')
+                )
+
+            candidates = sorted(professors, key=lambda x: x['match_score'], reverse=True)[:rerank_top_k]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def match(chunk: List[Dict]) -> None:
+            async with semaphore:
+                results = await self.gemini.aanalyze_research_matches(
+                    user_interests,
+                    [professor.get('research_interests', '[]') for professor in chunk]
+                )
+
+            # Keep the rest of the analysis from the same response
+            for professor, result in zip(chunk, results):
+                professor['match_score'] = float(result.get('score', 50))
+                professor['matching_areas'] = result.get('matching_areas', [])
+                professor['collaboration_opportunities'] = result.get('opportunities', '')
+                professor['match_explanation'] = result.get('explanation', '')
+
+        chunks = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+        await asyncio.gather(*(match(chunk) for chunk in chunks))
 
-        # Sort by match score (highest first)
-        professors.sort(key=lambda x: x.get('match_score', 0), reverse=True)
+        # Sort by match score (highest first); keyword and Gemini scores are on
+        # different scales, so professors Gemini did not re-score form a lower tier
+        rescored = {id(professor) for professor in candidates}
+
+        def rank(professor: Dict):
+            return id(professor) in rescored, professor.get('match_score', 0)
+
+        # Partial selection when only top K are needed
+        if top_k is not None:
+            professors = heapq.nlargest(top_k, professors, key=rank)
+        else:
+            professors.sort(key=rank, reverse=True)
 
         logger.info(f"Match scores calculated. Top score: {professors[0].get('match_score', 0) if professors else 0}")
         return professors
+
+    def batch_match_professors(
+        self,
+        user_interests: str,
+        professors: List[Dict],
+        batch_size: int = 10,
+        rerank_top_k: Optional[int] = None,
+        top_k: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Calculate match scores for multiple professors
+        Args:
+            user_interests: User's research interests
+            professors: List of professor dictionaries
+            batch_size: Professors analyzed per Gemini request
+            rerank_top_k: If set, only re-score the top K keyword matches with Gemini
+            top_k: If set, return only the K best matches
+        Returns:
+            Professors with added match_score field, sorted by score
+        """
+        return self.gemini.run(self.abatch_match_professors(
+            user_interests,
+            professors,
+            batch_size=batch_size,
+            rerank_top_k=rerank_top_k,
+            top_k=top_k
+        ))
+
+
+@functools.lru_cache(maxsize=None)
+def get_matching_engine(api_key: str, model: str = GeminiService.DEFAULT_MODEL) -> MatchingEngine:
+    """
+    Get the shared MatchingEngine for an API key and model
+    Args:
+        api_key: Google Gemini API key
+        model: Gemini model name
+    Returns:
+        Cached MatchingEngine backed by the shared GeminiService
+    """
+    return MatchingEngine(get_gemini_service(api_key, model))
@@ -3,8 +3,11 @@ Batch Manager
 Manages batch email operations and tracking
 """
 from datetime import datetime
+import csv
+import io
 import logging
 from typing import List, Dict, Optional
+from sqlalchemy import case, insert, update
 from models import db, Email, EmailBatch, Application
 
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +17,9 @@ logger = logging.getLogger(__name__)
 class BatchManager:
     """Manages email batches and bulk operations"""
 
+    # Batches at least this large are loaded with COPY on PostgreSQL
+    COPY_THRESHOLD = 100
+
     def __init__(self, max_batch_size: int = 50):
         """
         Initialize batch manager
@@ -40,18 +46,24 @@ class BatchManager:
                 status='draft'
             )
             db.session.add(batch)
-            db.session.flush()  # Get batch ID
+            db.session.flush()  # Get batch ID (INSERT ... RETURNING on PostgreSQL)
 
             # Create email records
-            for email_data in emails:
-                email = Email(
-                    application_id=email_data['application_id'],
-                    batch_id=batch.id,
-                    subject=email_data['subject'],
-                    body=email_data['body'],
-                    status='draft'
-                )
-                db.session.add(email)
+            if len(emails) >= self.COPY_THRESHOLD and db.session.get_bind().dialect.name == 'postgresql':
+                self._copy_emails(batch.id, emails)
+            else:
+                # ORM bulk INSERT: rows are sent as multi-row VALUES batches
+                # (insertmanyvalues), skipping per-row ORM bookkeeping
+                db.session.execute(insert(Email), [
+                    {
+                        'application_id': email_data['application_id'],
+                        'batch_id': batch.id,
+                        'subject': email_data['subject'],
+                        'body': email_data['body'],
+                        'status': 'draft'
+                    }
+                    for email_data in emails
+                ])
 
             db.session.commit()
             logger.info(f"Created batch {batch.id} with {len(emails)} emails")
@@ -62,6 +74,34 @@ class BatchManager:
             logger.error(f"Error creating batch: {str(e)}")
             return None
 
+    def _copy_emails(self, batch_id: int, emails: List[Dict]) -> None:
+        """
+        Load batch emails with PostgreSQL COPY in the current transaction
+        Args:
+            batch_id: Batch ID
+            emails: List of email dictionaries with application_id, subject, body
+        """
+        # COPY bypasses ORM column defaults, so timestamps and counters are written explicitly
+        now = datetime.utcnow()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for email_data in emails:
+            writer.writerow([
+                email_data['application_id'], batch_id, email_data['subject'],
+                email_data['body'], 'draft', 0, now, now
+            ])
+        buffer.seek(0)
+
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                'COPY emails (application_id, batch_id, subject, body, status, '
+                'retry_count, created_at, updated_at) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+        finally:
+            cursor.close()
+
     def get_batch(self, batch_id: int) -> Optional[EmailBatch]:
         """Get batch by ID"""
         return EmailBatch.query.get(batch_id)
@@ -103,13 +143,12 @@ class BatchManager:
             # Update batch status
             batch.status = 'approved'
 
-            # Update email status
-            emails = self.get_batch_emails(batch_id, status='draft')
-            for email in emails:
-                email.status = 'approved'
+            # Update email status in one set-based UPDATE
+            updated = Email.query.filter_by(batch_id=batch_id, status='draft')\
+                .update({Email.status: 'approved'}, synchronize_session=False)
 
             db.session.commit()
-            logger.info(f"Batch {batch_id} approved with {len(emails)} emails")
+            logger.info(f"Batch {batch_id} approved with {updated} emails")
             return True
 
         except Exception as e:
@@ -126,25 +165,36 @@ class BatchManager:
             True if updated successfully
         """
         try:
-            email = Email.query.get(email_id)
-            if not email:
+            row = db.session.query(Email.application_id, Email.batch_id).filter_by(id=email_id).first()
+            if not row:
                 return False
 
-            email.status = 'sent'
-            email.sent_at = datetime.utcnow()
+            now = datetime.utcnow()
 
-            # Update application status
-            if email.application:
-                email.application.status = 'sent'
-                email.application.applied_date = datetime.utcnow()
+            db.session.execute(
+                update(Email).where(Email.id == email_id).values(status='sent', sent_at=now)
+            )
 
-            # Update batch count
-            if email.batch:
-                email.batch.sent_count += 1
+            # Update application status
+            db.session.execute(
+                update(Application)
+                .where(Application.id == row.application_id)
+                .values(status='sent', applied_date=now)
+            )
 
-                # Check if batch complete
-                if email.batch.sent_count >= email.batch.total_count:
-                    email.batch.status = 'completed'
+            # Update batch count, completing the batch in the same statement
+            if row.batch_id is not None:
+                db.session.execute(
+                    update(EmailBatch)
+                    .where(EmailBatch.id == row.batch_id)
+                    .values(
+                        sent_count=EmailBatch.sent_count + 1,
+                        status=case(
+                            (EmailBatch.sent_count + 1 >= EmailBatch.total_count, 'completed'),
+                            else_=EmailBatch.status
+                        )
+                    )
+                )
 
             db.session.commit()
             return True
@@ -3,6 +3,7 @@ Email Scheduler
 Schedules emails for optimal sending times
 """
 from datetime import datetime, timedelta
+import functools
 import logging
 from typing import List, Optional
 import pytz
@@ -11,12 +12,46 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=128)
+def _get_tz(name: str) -> pytz.BaseTzInfo:
+    """
+    Resolve a timezone name (memoized, so zoneinfo is parsed once per name)
+    Args:
+        name: Timezone name (e.g., 'America/New_York')
+    Returns:
+        Timezone object, or UTC if the name is unknown
+    """
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        return pytz.UTC
+
+
 class EmailScheduler:
     """Schedules emails for optimal delivery times"""
 
     # Optimal sending hours (9 AM - 5 PM)
     OPTIMAL_HOURS = list(range(9, 18))
 
+    # Common timezone per country
+    TIMEZONE_MAP = {
+        'USA': 'America/New_York',
+        'UK': 'Europe/London',
+        'Canada': 'America/Toronto',
+        'Germany': 'Europe/Berlin',
+        'Australia': 'Australia/Sydney',
+        'Singapore': 'Asia/Singapore',
+        'Switzerland': 'Europe/Zurich',
+        'Netherlands': 'Europe/Amsterdam',
+        'Sweden': 'Europe/Stockholm',
+        'China': 'Asia/Shanghai',
+        'Hong Kong': 'Asia/Hong_Kong',
+        'Japan': 'Asia/Tokyo',
+        'France': 'Europe/Paris',
+        'Norway': 'Europe/Oslo',
+        'New Zealand': 'Pacific/Auckland'
+    }
+
     def __init__(self):
         """Initialize scheduler"""
         pass
@@ -34,11 +69,7 @@ class EmailScheduler:
         Returns:
             Scheduled datetime
         """
-        try:
-            tz = pytz.timezone(timezone)
-        except:
-            tz = pytz.UTC
-
+        tz = _get_tz(timezone)
         now = datetime.now(tz)
 
         # If preferred hour specified and valid
@@ -92,12 +123,14 @@ class EmailScheduler:
             scheduled_times.append(current_time)
             current_time += timedelta(minutes=interval_minutes)
 
-            # Skip non-optimal hours
-            while current_time.hour not in self.OPTIMAL_HOURS:
-                # Move to next day's 9 AM
-                current_time = (current_time + timedelta(days=1)).replace(
-                    hour=9, minute=0, second=0, microsecond=0
+            # Skip non-optimal hours: jump straight to 9 AM (today if early, else tomorrow)
+            if current_time.hour not in self.OPTIMAL_HOURS:
+                start_of_window = current_time.replace(
+                    hour=self.OPTIMAL_HOURS[0], minute=0, second=0, microsecond=0
                 )
+                if current_time.hour > self.OPTIMAL_HOURS[-1]:
+                    start_of_window += timedelta(days=1)
+                current_time = start_of_window
 
         return scheduled_times
 
@@ -109,22 +142,4 @@ class EmailScheduler:
         Returns:
             Timezone string
         """
-        timezone_map = {
-            'USA': 'America/New_York',
-            'UK': 'Europe/London',
-            'Canada': 'America/Toronto',
-            'Germany': 'Europe/Berlin',
-            'Australia': 'Australia/Sydney',
-            'Singapore': 'Asia/Singapore',
-            'Switzerland': 'Europe/Zurich',
-            'Netherlands': 'Europe/Amsterdam',
-            'Sweden': 'Europe/Stockholm',
-            'China': 'Asia/Shanghai',
-            'Hong Kong': 'Asia/Hong_Kong',
-            'Japan': 'Asia/Tokyo',
-            'France': 'Europe/Paris',
-            'Norway': 'Europe/Oslo',
-            'New Zealand': 'Pacific/Auckland'
-        }
-
-        return timezone_map.get(country, 'UTC')
+        return self.TIMEZONE_MAP.get(country, 'UTC')
@@ -6,14 +6,33 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
+import functools
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=32)
+def _load_attachment(file_path: str, mtime: float) -> MIMEApplication:
+    """
+    Read and base64-encode an attachment once per file version
+    Args:
+        file_path: Path of the file to attach
+        mtime: File modification time (part of the cache key)
+    Returns:
+        Encoded attachment part, shared by every email that attaches the file
+    """
+    with open(file_path, 'rb') as f:
+        attachment = MIMEApplication(f.read())
+
+    filename = os.path.basename(file_path)
+    attachment.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+    return attachment
+
+
 class SMTPService:
     """Service for sending emails via SMTP"""
 
@@ -39,6 +58,51 @@ class SMTPService:
         self.smtp_user = smtp_user
         self.smtp_password = smtp_password
         self.from_name = from_name
+        self._server: Optional[smtplib.SMTP] = None
+        self._depth = 0
+
+    def __enter__(self) -> 'SMTPService':
+        """Keep one SMTP connection open for every send inside the block"""
+        # Nested blocks (e.g. send_many inside `with smtp:`) share the connection
+        if self._server is None:
+            self._server = self._connect()
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self.close()
+
+    def close(self) -> None:
+        """Close the persistent SMTP connection, if open"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP connection"""
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+        try:
+            server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _send_persistent(self, msg: MIMEMultipart) -> None:
+        """Send on the persistent connection, reconnecting once if the server dropped it"""
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            logger.info("SMTP connection lost, reconnecting")
+            self.close()
+            self._server = self._connect()
+            self._server.send_message(msg)
 
     def send_email(
         self,
@@ -71,20 +135,14 @@ class SMTPService:
             if attachments:
                 for file_path in attachments:
                     if os.path.exists(file_path):
-                        with open(file_path, 'rb') as f:
-                            attachment = MIMEApplication(f.read())
-                            filename = os.path.basename(file_path)
-                            attachment.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename="{filename}"'
-                            )
-                            msg.attach(attachment)
-
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+                        msg.attach(_load_attachment(file_path, os.path.getmtime(file_path)))
+
+            # Send email, reusing the open connection inside a `with` block
+            if self._server is not None:
+                self._send_persistent(msg)
+            else:
+                with self._connect() as server:
+                    server.send_message(msg)
 
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -93,6 +151,30 @@ class SMTPService:
             logger.error(f"Error sending email to {to_email}: {str(e)}")
             return False
 
+    def send_many(
+        self,
+        messages: List[Tuple[str, str, str]],
+        attachments: Optional[List[str]] = None
+    ) -> List[bool]:
+        """
+        Send several emails over one SMTP connection
+        Args:
+            messages: (to_email, subject, body) tuples
+            attachments: List of file paths to attach to every email
+        Returns:
+            Per-message success flags in input order
+        """
+        try:
+            with self:
+                return [
+                    self.send_email(to_email, subject, body, attachments)
+                    for to_email, subject, body in messages
+                ]
+
+        except Exception as e:
+            logger.error(f"Error opening SMTP connection: {str(e)}")
+            return [False] * len(messages)
+
     def test_connection(self) -> bool:
         """
         Test SMTP connection
@@ -100,9 +182,8 @@ class SMTPService:
             True if connection successful
         """
         try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
+            with self._connect():
+                pass
             logger.info("SMTP connection test successful")
             return True
 
@@ -6,15 +6,51 @@ import requests
 from bs4 import BeautifulSoup
 import time
 import random
-import json
 import re
+import functools
 import logging
+import orjson
 from typing import List, Dict, Optional
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Address fragments that mark generic (non-professor) mailboxes
+_GENERIC_EMAIL_MARKERS = ('webmaster', 'admin', 'info', 'contact')
+
+# Common university domain mappings, keyed by lowercased name fragment
+_DOMAIN_MAP = {
+    'mit': 'mit.edu',
+    'stanford': 'stanford.edu',
+    'harvard': 'harvard.edu',
+    'berkeley': 'berkeley.edu',
+    'oxford': 'ox.ac.uk',
+    'cambridge': 'cam.ac.uk',
+    'toronto': 'utoronto.ca'
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _university_domain(university_name: str) -> str:
+    """
+    Extract or generate an email domain (memoized per university name)
+    Args:
+        university_name: University name
+    Returns:
+        Email domain
+    """
+    name = university_name.lower()
+    for key, domain in _DOMAIN_MAP.items():
+        if key in name:
+            return domain
+
+    # Generate generic domain
+    words = name.split()
+    if len(words) > 0:
+        return f"{words[0]}.edu"
+    return "university.edu"
+
 
 class ProfessorScraper:
     """Scrapes professor information from various sources"""
@@ -45,6 +81,17 @@ class ProfessorScraper:
         ]
     }
 
+    # Compiled once at class load instead of on every extract_email_from_page call
+    _EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+    # Email address formats, chosen before any formatting is done
+    EMAIL_FORMATS = (
+        '{first}.{last}@{domain}',
+        '{initial}{last}@{domain}',
+        '{first}_{last}@{domain}',
+        '{last}@{domain}'
+    )
+
     def __init__(self, delay_min: int = 2, delay_max: int = 5, timeout: int = 30):
         """
         Initialize scraper
@@ -77,75 +124,68 @@ class ProfessorScraper:
         """
         logger.info(f"Scraping professors for {university_name}")
 
-        professors = []
-
-        for i in range(min(limit, 50)):  # Generate up to 50 professors
-            first_name = random.choice(self.SAMPLE_PROFESSORS['first_names'])
-            last_name = random.choice(self.SAMPLE_PROFESSORS['last_names'])
-            name = f"{first_name} {last_name}"
+        count = min(limit, 50)  # Generate up to 50 professors
 
-            # Generate email
-            email = self._generate_email(first_name, last_name, university_name)
-
-            # Select random research interests
-            interests = random.sample(
-                self.SAMPLE_PROFESSORS['research_interests'],
-                k=random.randint(3, 6)
-            )
+        # Draw each random column in one call rather than per row
+        first_names = random.choices(self.SAMPLE_PROFESSORS['first_names'], k=count)
+        last_names = random.choices(self.SAMPLE_PROFESSORS['last_names'], k=count)
+        departments = random.choices(self.SAMPLE_PROFESSORS['departments'], k=count)
+        h_indexes = random.choices(range(10, 81), k=count)
+        accepting = random.choices([True, False], weights=[3, 1], k=count)  # 75% accepting
+        scholar_ids = random.choices(range(100000, 1000000), k=count)
+        domain = self._get_domain(university_name)
+        scraped_at = datetime.utcnow()
+
+        # Derive the per-professor columns, then build the rows in one pass
+        names = [f"{first} {last}" for first, last in zip(first_names, last_names)]
+        emails = [self._generate_email(first, last, domain) for first, last in zip(first_names, last_names)]
+        research_interests = [
+            orjson.dumps(random.sample(self.SAMPLE_PROFESSORS['research_interests'], k=random.randint(3, 6))).decode()
+            for _ in range(count)
+        ]
+        publications = [orjson.dumps(self._generate_publications(name)).decode() for name in names]
+        profile_urls = [
+            f"https://{domain}/faculty/{first.lower()}-{last.lower()}"
+            for first, last in zip(first_names, last_names)
+        ]
 
-            professor = {
+        professors = [
+            {
                 'university_id': university_id,
                 'name': name,
                 'email': email,
-                'department': random.choice(self.SAMPLE_PROFESSORS['departments']),
-                'research_interests': json.dumps(interests),
-                'publications': json.dumps(self._generate_publications(name)),
-                'h_index': random.randint(10, 80),
-                'accepting_students': random.choice([True, True, True, False]),  # 75% accepting
-                'profile_url': f"https://{self._get_domain(university_name)}/faculty/{first_name.lower()}-{last_name.lower()}",
-                'google_scholar_url': f"https://scholar.google.com/citations?user={random.randint(100000, 999999)}",
-                'last_scraped': datetime.utcnow(),
+                'department': department,
+                'research_interests': interests,
+                'publications': pubs,
+                'h_index': h_index,
+                'accepting_students': accepts,
+                'profile_url': profile_url,
+                'google_scholar_url': f"https://scholar.google.com/citations?user={scholar_id}",
+                'last_scraped': scraped_at,
                 'scrape_status': 'completed'
             }
-
-            professors.append(professor)
+            for name, email, department, interests, pubs, h_index, accepts, profile_url, scholar_id in zip(
+                names, emails, departments, research_interests, publications,
+                h_indexes, accepting, profile_urls, scholar_ids
+            )
+        ]
 
         logger.info(f"Scraped {len(professors)} professors")
         return professors
 
-    def _generate_email(self, first_name: str, last_name: str, university_name: str) -> str:
-        """Generate professor email"""
-        domain = self._get_domain(university_name)
-        formats = [
-            f"{first_name.lower()}.{last_name.lower()}@{domain}",
-            f"{first_name[0].lower()}{last_name.lower()}@{domain}",
-            f"{first_name.lower()}_{last_name.lower()}@{domain}",
-            f"{last_name.lower()}@{domain}"
-        ]
-        return random.choice(formats)
+    def _generate_email(self, first_name: str, last_name: str, domain: str) -> str:
+        """Generate professor email at the given domain"""
+        first = first_name.lower()
+        return random.choice(self.EMAIL_FORMATS).format(
+            first=first,
+            initial=first[0],
+            last=last_name.lower(),
+            domain=domain
+        )
 
     def _get_domain(self, university_name: str) -> str:
         """Extract or generate domain from university name"""
-        # Common university domain mappings
-        domain_map = {
-            'MIT': 'mit.edu',
-            'Stanford': 'stanford.edu',
-            'Harvard': 'harvard.edu',
-            'Berkeley': 'berkeley.edu',
-            'Oxford': 'ox.ac.uk',
-            'Cambridge': 'cam.ac.uk',
-            'Toronto': 'utoronto.ca'
-        }
-
-        for key, domain in domain_map.items():
-            if key.lower() in university_name.lower():
-                return domain
-
-        # Generate generic domain
-        words = university_name.lower().split()
-        if len(words) > 0:
-            return f"{words[0]}.edu"
-        return "university.edu"
+        return _university_domain(university_name)
 
     def _generate_publications(self, professor_name: str) -> List[Dict]:
         """Generate sample publications"""
@@ -200,13 +240,11 @@ class ProfessorScraper:
         Returns:
             Email address or None
         """
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        emails = re.findall(email_pattern, html)
-
-        if emails:
-            # Filter out common non-professor emails
-            filtered = [e for e in emails if not any(x in e.lower() for x in ['webmaster', 'admin', 'info', 'contact'])]
-            if filtered:
-                return filtered[0]
+        # Stop at the first match that is not a common non-professor email
+        for match in self._EMAIL_RE.finditer(html):
+            email = match.group()
+            lowered = email.lower()
+            if not any(marker in lowered for marker in _GENERIC_EMAIL_MARKERS):
+                return email
 
         return None
@@ -3,18 +3,31 @@ University Scraper Service
 Scrapes universities from multiple countries and sources
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
 from bs4 import BeautifulSoup
+import asyncio
+import functools
+import threading
 import time
 import random
-import json
 import logging
+import orjson
 from typing import List, Dict, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4096)
+def _url_host(url: str) -> str:
+    """Return the host (netloc) of a URL, memoized per URL"""
+    return urlsplit(url).netloc
+
+
 class UniversityScraper:
     """Scrapes university information from various sources"""
 
@@ -100,25 +113,89 @@ class UniversityScraper:
         ]
     }
 
-    def __init__(self, delay_min: int = 2, delay_max: int = 5, timeout: int = 30):
+    # Sample JSON fields, serialized once at class load instead of per row
+    SCHOLARSHIP_INFO_JSON = {
+        available: orjson.dumps({
+            'available': available,
+            'types': ['Full Scholarship', 'Tuition Waiver', 'Stipend'],
+            'deadline': '2024-12-31'
+        }).decode()
+        for available in (True, False)
+    }
+    RESEARCH_AREAS_JSON = orjson.dumps([
+        'Machine Learning',
+        'Artificial Intelligence',
+        'Aerospace Engineering',
+        'Manufacturing',
+        'Robotics',
+        'Deep Learning'
+    ]).decode()
+    CONTACT_INFO_JSON = orjson.dumps({
+        'phone': '+1-XXX-XXX-XXXX',
+        'email': 'admissions@university.edu',
+        'address': 'University Address'
+    }).decode()
+
+    # Earliest time (time.monotonic) the next request may hit each host,
+    # shared by all scraper instances so politeness holds across them
+    _host_ready: Dict[str, float] = {}
+    _host_lock = threading.Lock()
+
+    def __init__(
+        self,
+        delay_min: int = 2,
+        delay_max: int = 5,
+        timeout: int = 30,
+        max_retries: int = 3,
+        max_concurrent: int = 15,
+        max_per_host: int = 2
+    ):
         """
         Initialize scraper
         Args:
             delay_min: Minimum delay between requests (seconds)
             delay_max: Maximum delay between requests (seconds)
             timeout: Request timeout (seconds)
+            max_retries: Retries for connection errors and 429/5xx responses
+            max_concurrent: Default cap on requests in flight in batch scrapes
+            max_per_host: Cap on requests in flight to any one host in batch scrapes
         """
         self.delay_min = delay_min
         self.delay_max = delay_max
         self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
 
-    def _random_delay(self) -> None:
-        """Add random delay between requests"""
-        time.sleep(random.uniform(self.delay_min, self.delay_max))
+        # Larger keep-alive pools plus urllib3-level retry with backoff
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=delay_min,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _reserve_host_slot(self, url: str) -> float:
+        """
+        Reserve the next request slot for a URL's host
+        Requests to the same host are spaced by delay_min-delay_max seconds;
+        different hosts are not delayed by each other.
+        Args:
+            url: URL about to be requested
+        Returns:
+            Seconds to wait before sending the request
+        """
+        host = _url_host(url)
+        with self._host_lock:
+            now = time.monotonic()
+            start = max(now, self._host_ready.get(host, 0.0))
+            self._host_ready[host] = start + random.uniform(self.delay_min, self.delay_max)
+        return start - now
 
     def scrape_universities(self, country: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
         """
@@ -132,6 +209,7 @@ class UniversityScraper:
         logger.info(f"Scraping universities for country: {country or 'ALL'}")
 
         universities = []
+        scraped_at = datetime.utcnow()
 
         if country and country in self.UNIVERSITIES_DATABASE:
             countries = [country]
@@ -145,22 +223,11 @@ class UniversityScraper:
                     'country': country_name,
                     'website': uni_data['website'],
                     'has_scholarship': random.choice([True, False]),  # Simulated
-                    'scholarship_info': json.dumps({
-                        'available': random.choice([True, False]),
-                        'types': ['Full Scholarship', 'Tuition Waiver', 'Stipend'],
-                        'deadline': '2024-12-31'
-                    }),
-                    'research_areas': json.dumps([
-                        'Machine Learning',
-                        'Artificial Intelligence',
-                        'Aerospace Engineering',
-                        'Manufacturing',
-                        'Robotics',
-                        'Deep Learning'
-                    ]),
+                    'scholarship_info': self.SCHOLARSHIP_INFO_JSON[random.choice([True, False])],
+                    'research_areas': self.RESEARCH_AREAS_JSON,
                     'ranking': random.randint(1, 500),
                     'location': self._get_location(country_name),
-                    'last_scraped': datetime.utcnow(),
+                    'last_scraped': scraped_at,
                     'scrape_status': 'completed'
                 }
 
@@ -203,30 +270,85 @@ class UniversityScraper:
         """
         try:
             logger.info(f"Scraping details from {website}")
-            self._random_delay()
+            time.sleep(self._reserve_host_slot(website))
 
             response = self.session.get(website, timeout=self.timeout)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Extract basic information (simplified)
-            details = {
-                'contact_info': json.dumps({
-                    'phone': '+1-XXX-XXX-XXXX',
-                    'email': 'admissions@university.edu',
-                    'address': 'University Address'
-                }),
-                'scrape_status': 'completed',
-                'last_scraped': datetime.utcnow()
-            }
-
-            return details
+            return self._parse_details(response.content)
 
         except Exception as e:
             logger.error(f"Error scraping {website}: {str(e)}")
-            return {
-                'scrape_status': 'failed',
-                'last_scraped': datetime.utcnow()
-            }
+            return self._failed_details()
+
+    async def ascrape_university_details_batch(
+        self,
+        websites: List[str],
+        concurrency: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Scrape details from many university websites concurrently
+        Args:
+            websites: University website URLs
+            concurrency: Maximum requests in flight at once (defaults to max_concurrent)
+        Returns:
+            Detail dictionaries in website order
+        """
+        concurrency = concurrency or self.max_concurrent
+        semaphore = asyncio.Semaphore(concurrency)
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        loop = asyncio.get_running_loop()
+
+        async def scrape(client: httpx.AsyncClient, website: str) -> Dict:
+            try:
+                await asyncio.sleep(self._reserve_host_slot(website))
+                host = _url_host(website)
+
+                async with host_semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host)), semaphore:
+                    logger.info(f"Scraping details from {website}")
+                    response = await client.get(website)
+
+                # Parse in a worker thread so large pages do not stall other fetches
+                return await loop.run_in_executor(None, self._parse_details, response.content)
+
+            except Exception as e:
+                logger.error(f"Error scraping {website}: {str(e)}")
+                return self._failed_details()
+
+        async with httpx.AsyncClient(
+            headers=dict(self.session.headers),
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        ) as client:
+            return await asyncio.gather(*(scrape(client, website) for website in websites))
+
+    def scrape_university_details_batch(self, websites: List[str], concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Synchronous wrapper around ascrape_university_details_batch
+        Args:
+            websites: University website URLs
+            concurrency: Maximum requests in flight at once (defaults to max_concurrent)
+        Returns:
+            Detail dictionaries in website order
+        """
+        return asyncio.run(self.ascrape_university_details_batch(websites, concurrency=concurrency))
+
+    def _parse_details(self, content: bytes) -> Dict:
+        """Extract details from a fetched university page"""
+        soup = BeautifulSoup(content, 'lxml')
+
+        # Extract basic information (simplified)
+        return {
+            'contact_info': self.CONTACT_INFO_JSON,
+            'scrape_status': 'completed',
+            'last_scraped': datetime.utcnow()
+        }
+
+    def _failed_details(self) -> Dict:
+        """Details recorded when a page could not be scraped"""
+        return {
+            'scrape_status': 'failed',
+            'last_scraped': datetime.utcnow()
+        }
 
     def get_available_countries(self) -> List[str]:
         """Get list of available countries"""
@@ -41,24 +41,25 @@ def send_email_batch_task(self, batch_id, user_name, cv_path=None):
 
         sent_count = 0
         failed_count = 0
-
-        for email in emails:
-            # Send email
-            attachments = [cv_path] if cv_path else None
-
-            success = smtp.send_email(
-                to_email=email.application.professor.email,
-                subject=email.subject,
-                body=email.body,
-                attachments=attachments
-            )
-
-            if success:
-                batch_manager.mark_email_sent(email.id)
-                sent_count += 1
-            else:
-                batch_manager.mark_email_failed(email.id, 'SMTP send failed')
-                failed_count += 1
+        attachments = [cv_path] if cv_path else None
+
+        # Reuse one SMTP connection for the whole batch
+        with smtp:
+            for email in emails:
+                # Send email
+                success = smtp.send_email(
+                    to_email=email.application.professor.email,
+                    subject=email.subject,
+                    body=email.body,
+                    attachments=attachments
+                )
+
+                if success:
+                    batch_manager.mark_email_sent(email.id)
+                    sent_count += 1
+                else:
+                    batch_manager.mark_email_failed(email.id, 'SMTP send failed')
+                    failed_count += 1
 
         logger.info(f"Batch send completed. Sent: {sent_count}, Failed: {failed_count}")
 
@@ -47,6 +47,51 @@ def scrape_universities_task(self, country=None, limit=50):
         }
 
 
+@celery.task(bind=True, name='tasks.scrape_university_details')
+def scrape_university_details_task(self, university_ids=None):
+    """
+    Celery task to fill in university details from their websites
+    Args:
+        university_ids: University IDs to scrape (all with a website if None)
+    Returns:
+        Dictionary with results
+    """
+    try:
+        query = University.query.filter(University.website.isnot(None))
+        if university_ids:
+            query = query.filter(University.id.in_(university_ids))
+        universities = query.all()
+
+        logger.info(f"Starting university details scraping task for {len(universities)} universities")
+
+        # Fetch all websites concurrently instead of one page at a time
+        scraper = UniversityScraper()
+        details = scraper.scrape_university_details_batch([u.website for u in universities])
+
+        for university, university_details in zip(universities, details):
+            for field, value in university_details.items():
+                setattr(university, field, value)
+        db.session.commit()
+
+        failed_count = sum(1 for d in details if d['scrape_status'] == 'failed')
+
+        logger.info(f"University details scraping completed. {len(details) - failed_count} succeeded, {failed_count} failed")
+
+        return {
+            'status': 'success',
+            'count': len(details) - failed_count,
+            'failed': failed_count
+        }
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in university details scraping task: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+
 @celery.task(bind=True, name='tasks.scrape_professors')
 def scrape_professors_task(self, university_id, university_name, limit=50):
     """
@@ -9,8 +9,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
-from models import db, User, University, Professor
+from models import db, User, University, Professor, Application
 from services.ai import GeminiService, EmailGenerator
+from services.email import BatchManager
 from config import Config
 
 
@@ -110,5 +111,108 @@ def test_get_batches(client, auth_token):
     assert 'batches' in data
 
 
+@pytest.fixture
+def test_applications(app, test_professor):
+    """Create a user with draft applications"""
+    with app.app_context():
+        user = User(email='batch@example.com', name='Batch User')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.flush()
+
+        application_ids = []
+        for _ in range(3):
+            application = Application(user_id=user.id, professor_id=test_professor, status='draft')
+            db.session.add(application)
+            db.session.flush()
+            application_ids.append(application.id)
+
+        db.session.commit()
+        return user.id, application_ids
+
+
+def test_batch_manager_create_batch(app, test_applications):
+    """Test batch creation inserts all emails as drafts"""
+    user_id, application_ids = test_applications
+
+    with app.app_context():
+        manager = BatchManager()
+        batch = manager.create_batch(user_id, [
+            {'application_id': app_id, 'subject': 'PhD Inquiry', 'body': 'Dear Professor'}
+            for app_id in application_ids
+        ])
+
+        emails = manager.get_batch_emails(batch.id)
+        assert batch.total_count == 3
+        assert sorted(e.application_id for e in emails) == application_ids
+        assert all(e.status == 'draft' for e in emails)
+
+
+def test_batch_manager_create_large_batch(app, test_applications):
+    """Test batches above the COPY threshold still insert on non-PostgreSQL databases"""
+    user_id, application_ids = test_applications
+    count = BatchManager.COPY_THRESHOLD + 20
+
+    with app.app_context():
+        manager = BatchManager()
+        batch = manager.create_batch(user_id, [
+            {'application_id': application_ids[i % len(application_ids)], 'subject': 'PhD Inquiry', 'body': 'Dear Professor'}
+            for i in range(count)
+        ])
+
+        assert batch is not None
+        assert batch.total_count == count
+        assert len(manager.get_batch_emails(batch.id)) == count
+
+
+def test_batch_manager_approve_batch(app, test_applications):
+    """Test approving a batch approves its draft emails"""
+    user_id, application_ids = test_applications
+
+    with app.app_context():
+        manager = BatchManager()
+        batch = manager.create_batch(user_id, [
+            {'application_id': app_id, 'subject': 'PhD Inquiry', 'body': 'Dear Professor'}
+            for app_id in application_ids
+        ])
+
+        assert manager.approve_batch(batch.id)
+        assert manager.get_batch(batch.id).status == 'approved'
+        assert len(manager.get_batch_emails(batch.id, status='approved')) == 3
+
+        # Only draft batches can be approved
+        assert not manager.approve_batch(batch.id)
+
+
+def test_batch_manager_mark_email_sent(app, test_applications):
+    """Test marking emails sent updates application and completes the batch"""
+    user_id, application_ids = test_applications
+
+    with app.app_context():
+        manager = BatchManager()
+        batch = manager.create_batch(user_id, [
+            {'application_id': app_id, 'subject': 'PhD Inquiry', 'body': 'Dear Professor'}
+            for app_id in application_ids
+        ])
+        emails = manager.get_batch_emails(batch.id)
+
+        assert manager.mark_email_sent(emails[0].id)
+        db.session.expire_all()
+        assert manager.get_batch(batch.id).sent_count == 1
+        assert manager.get_batch(batch.id).status == 'draft'
+        assert db.session.get(Application, emails[0].application_id).status == 'sent'
+
+        for email in emails[1:]:
+            assert manager.mark_email_sent(email.id)
+        db.session.expire_all()
+
+        batch = manager.get_batch(batch.id)
+        assert batch.sent_count == 3
+        assert batch.status == 'completed'
+        assert all(e.status == 'sent' and e.sent_at for e in manager.get_batch_emails(batch.id))
+
+        assert not manager.mark_email_sent(-1)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -3,14 +3,30 @@ Service Tests
 Tests for AI and utility services
 """
 import pytest
+import smtplib
 import sys
 import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import httpx
+import orjson
+from google import genai
+from google.genai import errors, types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.ai.gemini_service import GeminiService
+from services.ai.gemini_service import GeminiService, TokenBucket
 from services.ai.email_generator import EmailGenerator
 from services.ai.matching_engine import MatchingEngine
+from services.email.scheduler import EmailScheduler
+from services.email import smtp_service
+from services.email.smtp_service import SMTPService
+from services.scraper.professor_scraper import ProfessorScraper
+from services.scraper.university_scraper import UniversityScraper
 from config import Config
 
 
@@ -85,5 +101,560 @@ def test_email_template_generation():
     assert 'John Doe' in email['body']
 
 
+def test_parse_email_response():
+    """Test parsing of JSON-mode generated emails (no API needed)"""
+    gemini = GeminiService(Config.GEMINI_API_KEY if Config.GEMINI_API_KEY else 'test-key')
+    generator = EmailGenerator(gemini)
+
+    email = generator._parse_email_response(
+        '{"subject": "PhD Inquiry - Robotics", "body": "Dear Professor Smith,\\n\\nBest regards\\n"}'
+    )
+    assert email['subject'] == 'PhD Inquiry - Robotics'
+    assert email['body'] == 'Dear Professor Smith,\n\nBest regards'
+
+    # Non-JSON responses are used as the body with a default subject
+    email = generator._parse_email_response('Dear Professor Smith')
+    assert email['subject'] == 'PhD Application - Research Opportunity'
+    assert email['body'] == 'Dear Professor Smith'
+
+
+def test_email_generator_disk_cache(tmp_path):
+    """Test generated emails are served from the SQLite cache (no API needed)"""
+    calls = []
+
+    def fake_generate(prompt, config=None):
+        calls.append(prompt)
+        return '{"subject": "PhD Inquiry", "body": "Dear Professor Smith"}'
+
+    gemini = GeminiService('test-key')
+    gemini.generate_content = fake_generate
+    cache_path = str(tmp_path / 'emails.db')
+
+    kwargs = dict(
+        professor_name='Dr. Smith',
+        professor_research='["Robotics"]',
+        university_name='MIT',
+        user_name='John Doe',
+        user_research='Robotics'
+    )
+    first = EmailGenerator(gemini, cache_path=cache_path).generate_email(**kwargs)
+
+    # A fresh generator (e.g. after a restart) reuses the stored email
+    second = EmailGenerator(gemini, cache_path=cache_path).generate_email(**kwargs)
+
+    assert first == second == {'subject': 'PhD Inquiry', 'body': 'Dear Professor Smith'}
+    assert len(calls) == 1
+
+    # Expired entries are regenerated
+    EmailGenerator(gemini, cache_path=cache_path, cache_ttl=-1).generate_email(**kwargs)
+    assert len(calls) == 2
+
+    # Responses that do not decode are returned but never cached
+    def fake_generate_text(prompt, config=None):
+        calls.append(prompt)
+        return 'Dear Professor Smith'
+
+    gemini.generate_content = fake_generate_text
+    kwargs['professor_name'] = 'Dr. Jones'
+    for _ in range(2):
+        email = EmailGenerator(gemini, cache_path=cache_path).generate_email(**kwargs)
+        assert email == {'subject': 'PhD Application - Research Opportunity', 'body': 'Dear Professor Smith'}
+    assert len(calls) == 4
+
+
+def test_email_generator_cache_failures_fall_back_to_gemini(tmp_path, monkeypatch):
+    """Test an unusable cache is skipped instead of forcing the template (no API needed)"""
+    def fake_generate(prompt, config=None):
+        return '{"subject": "PhD Inquiry", "body": "Dear Professor Smith"}'
+
+    gemini = GeminiService('test-key')
+    gemini.generate_content = fake_generate
+    kwargs = dict(
+        professor_name='Dr. Smith',
+        professor_research='Robotics',
+        university_name='MIT',
+        user_name='John Doe',
+        user_research='Robotics'
+    )
+    expected = {'subject': 'PhD Inquiry', 'body': 'Dear Professor Smith'}
+
+    # Cache file that cannot be opened
+    generator = EmailGenerator(gemini, cache_path=str(tmp_path / 'missing' / 'emails.db'))
+    assert generator.generate_email(**kwargs) == expected
+    assert generator.generate_email(**kwargs) == expected
+
+    # Cache database locked by another writer
+    cache_path = str(tmp_path / 'emails.db')
+    monkeypatch.setattr(EmailGenerator, 'CACHE_TIMEOUT', 0)
+    generator = EmailGenerator(gemini, cache_path=cache_path)
+    assert generator.generate_email(**kwargs) == expected
+
+    other = sqlite3.connect(cache_path)
+    other.execute('BEGIN EXCLUSIVE')
+    try:
+        kwargs['professor_name'] = 'Dr. Jones'
+        assert generator.generate_email(**kwargs) == expected
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_parse_match_response():
+    """Test parsing of JSON-mode match analysis (no API needed)"""
+    gemini = GeminiService(Config.GEMINI_API_KEY if Config.GEMINI_API_KEY else 'test-key')
+
+    result = gemini._parse_match_response(
+        '{"score": 185, "matching_areas": ["Robotics", " Machine Learning"], '
+        '"opportunities": "Joint work on robot learning", "explanation": "Strong overlap."}'
+    )
+    assert result['score'] == 100
+    assert result['matching_areas'] == ['Robotics', 'Machine Learning']
+    assert result['opportunities'] == 'Joint work on robot learning'
+    assert result['explanation'] == 'Strong overlap.'
+
+    # Malformed responses fall back to the default score
+    assert gemini._parse_match_response('SCORE: 85')['score'] == 50
+
+
+def test_parse_batch_match_response():
+    """Test parsing of a multi-professor match analysis (no API needed)"""
+    gemini = GeminiService('test-key')
+
+    results = gemini._parse_batch_match_response(
+        '[{"index": 1, "score": 90, "matching_areas": ["AI"], "opportunities": "", "explanation": ""},'
+        ' {"index": 7, "score": 10, "matching_areas": [], "opportunities": "", "explanation": ""}]',
+        count=2
+    )
+
+    # Missing or out-of-range indices fall back to the default score
+    assert [r['score'] for r in results] == [50, 90]
+
+
+def test_keyword_match():
+    """Test Jaccard keyword fallback (no API needed)"""
+    gemini = GeminiService(Config.GEMINI_API_KEY if Config.GEMINI_API_KEY else 'test-key')
+    matcher = MatchingEngine(gemini)
+
+    assert matcher._keyword_match('["Robotics", "AI"]', '["Robotics", "Optimization"]') == pytest.approx(100 / 3)
+    assert matcher._keyword_match('["Robotics"]', '["Optimization"]') == 0.0
+    assert matcher._keyword_match('robotics control', 'robotics control') == 100.0
+
+
+def test_bulk_generate_preserves_order():
+    """Test bulk generation returns results in prompt order (no API needed)"""
+    async def fake_generate(prompt):
+        return None if prompt == 'fail' else prompt.upper()
+
+    gemini = GeminiService('test-key')
+    gemini.agenerate_content = fake_generate
+
+    results = gemini.bulk_generate(['a', 'fail', 'c'], concurrency=2)
+
+    assert results == ['A', None, 'C']
+
+
+def test_token_bucket_allows_burst():
+    """Test the rate limiter permits a burst, then throttles (no API needed)"""
+    bucket = TokenBucket(max_rate=3, time_period=60)
+
+    for _ in range(3):
+        assert bucket._try_acquire() == 0.0
+
+    # Bucket is empty: the next token refills after ~20 seconds
+    assert bucket._try_acquire() == pytest.approx(20, abs=0.1)
+
+
+def test_circuit_breaker_fails_fast():
+    """Test repeated API failures open the circuit breaker (no API needed)"""
+    calls = []
+
+    class FailingModels:
+        def generate_content(self, **kwargs):
+            calls.append(kwargs)
+            raise ConnectionError('Gemini unavailable')
+
+    class FailingClient:
+        models = FailingModels()
+
+    gemini = GeminiService('test-key')
+    gemini._client = FailingClient()
+    gemini.retry_delay = 0
+
+    for _ in range(3):
+        assert gemini.generate_content('prompt') is None
+
+    # Circuit opens after BREAKER_THRESHOLD failed attempts; later calls skip the API
+    assert len(calls) == GeminiService.BREAKER_THRESHOLD
+
+    # The breaker belongs to this instance (API key) only
+    assert not GeminiService('other-key')._circuit_open()
+
+
+def test_circuit_breaker_ignores_request_errors():
+    """Test non-transient API errors are neither retried nor counted (no API needed)"""
+    calls = []
+
+    class RejectingModels:
+        def generate_content(self, **kwargs):
+            calls.append(kwargs)
+            raise errors.ClientError(400, {'error': {'code': 400, 'message': 'Bad request', 'status': 'INVALID_ARGUMENT'}})
+
+    class RejectingClient:
+        models = RejectingModels()
+
+    gemini = GeminiService('test-key')
+    gemini._client = RejectingClient()
+
+    for _ in range(GeminiService.BREAKER_THRESHOLD):
+        assert gemini.generate_content('prompt') is None
+
+    assert len(calls) == GeminiService.BREAKER_THRESHOLD
+    assert not gemini._circuit_open()
+
+
+def test_generate_content_stream_failures():
+    """Test streaming errors are raised and counted by the circuit breaker (no API needed)"""
+    calls = []
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class BrokenModels:
+        def generate_content_stream(self, **kwargs):
+            calls.append(kwargs)
+            yield Chunk('Dear ')
+            raise ConnectionError('stream reset')
+
+    class BrokenClient:
+        models = BrokenModels()
+
+    gemini = GeminiService('test-key')
+    gemini._client = BrokenClient()
+
+    for _ in range(GeminiService.BREAKER_THRESHOLD):
+        chunks = []
+        with pytest.raises(ConnectionError):
+            for chunk in gemini.generate_content_stream('prompt'):
+                chunks.append(chunk)
+        assert chunks == ['Dear ']
+
+    # The breaker is open: streaming skips the API entirely
+    assert gemini._circuit_open()
+    assert list(gemini.generate_content_stream('prompt')) == []
+    assert len(calls) == GeminiService.BREAKER_THRESHOLD
+
+
+def test_generate_content_cache():
+    """Test repeated prompts are served from the response cache (no API needed)"""
+    calls = []
+
+    class Response:
+        text = '{"score": 80}'
+
+    class Models:
+        def generate_content(self, **kwargs):
+            calls.append(kwargs)
+            return Response()
+
+    class Client:
+        models = Models()
+
+    gemini = GeminiService('test-key')
+    gemini._client = Client()
+
+    assert gemini.generate_content('prompt') == '{"score": 80}'
+    assert gemini.generate_content('prompt') == '{"score": 80}'
+    assert len(calls) == 1
+
+    # A different prompt is a cache miss
+    gemini.generate_content('other prompt')
+    assert len(calls) == 2
+
+
+def test_batch_match_professors_sorted():
+    """Test concurrent batch matching sorts by score (no API needed)"""
+    gemini = GeminiService('test-key')
+    matcher = MatchingEngine(gemini)
+
+    async def fake_analyze(user_interests, professor_interests):
+        return [
+            {'score': matcher._keyword_match(user_interests, interests)}
+            for interests in professor_interests
+        ]
+
+    gemini.aanalyze_research_matches = fake_analyze
+
+    professors = [
+        {'name': 'A', 'research_interests': '["Optimization"]'},
+        {'name': 'B', 'research_interests': '["Robotics", "AI"]'},
+        {'name': 'C', 'research_interests': '["Robotics"]'}
+    ]
+    ranked = matcher.batch_match_professors('["Robotics", "AI"]', professors, batch_size=2)
+
+    assert [p['name'] for p in ranked] == ['B', 'C', 'A']
+    assert ranked[0]['match_score'] == 100.0
+
+    top = matcher.batch_match_professors('["Robotics", "AI"]', professors, top_k=2)
+    assert [p['name'] for p in top] == ['B', 'C']
+
+
+def test_batch_match_professors_reuses_async_client():
+    """Test repeated sync batch matching on one real client (local stub server, no API needed)"""
+    requests_seen = []
+    analysis = orjson.dumps([
+        {'index': i, 'score': 90 - i, 'matching_areas': [], 'opportunities': '', 'explanation': ''}
+        for i in range(2)
+    ])
+    body = orjson.dumps({'candidates': [{'content': {'role': 'model', 'parts': [{'text': analysis.decode()}]}}]})
+
+    class GeminiStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep connections alive, as the real API does
+
+        def do_POST(self):
+            requests_seen.append(self.path)
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GeminiStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        gemini = GeminiService('test-key')
+        gemini.retry_delay = 0
+        gemini._client = genai.Client(
+            api_key='test-key',
+            http_options=types.HttpOptions(
+                base_url=f'http://127.0.0.1:{server.server_port}',
+                # Force the httpx transport (used when aiohttp is not installed)
+                async_client_args={'transport': httpx.AsyncHTTPTransport()}
+            )
+        )
+        matcher = MatchingEngine(gemini)
+
+        for round_ in range(3):
+            professors = [
+                {'name': f'{round_}-{i}', 'research_interests': f'["Topic {round_}-{i}"]'}
+                for i in range(2)
+            ]
+            ranked = matcher.batch_match_professors('["Robotics"]', professors)
+            assert [p['match_score'] for p in ranked] == [90.0, 89.0]
+
+        assert len(requests_seen) == 3
+    finally:
+        server.shutdown()
+
+
+def test_batch_match_professors_rerank_top_k():
+    """Test only the top keyword matches are re-scored by Gemini (no API needed)"""
+    gemini = GeminiService('test-key')
+    matcher = MatchingEngine(gemini)
+    analyzed = []
+
+    async def fake_analyze(user_interests, professor_interests):
+        analyzed.extend(professor_interests)
+        return [
+            {'score': 30, 'matching_areas': ['Robotics'], 'opportunities': 'Robot learning', 'explanation': 'Overlap.'}
+            for _ in professor_interests
+        ]
+
+    gemini.aanalyze_research_matches = fake_analyze
+
+    professors = [
+        {'name': 'A', 'research_interests': '["Optimization"]'},
+        {'name': 'B', 'research_interests': '["Robotics", "AI"]'},
+        {'name': 'C', 'research_interests': '["Robotics"]'}
+    ]
+    ranked = matcher.batch_match_professors('["Robotics", "AI"]', professors, rerank_top_k=1)
+
+    # Keyword-only scores rank below every Gemini score, even when higher
+    assert analyzed == ['["Robotics", "AI"]']
+    assert [(p['name'], p['match_score']) for p in ranked] == [('B', 30.0), ('C', 50.0), ('A', 0.0)]
+    assert ranked[0]['matching_areas'] == ['Robotics']
+    assert ranked[0]['collaboration_opportunities'] == 'Robot learning'
+    assert 'matching_areas' not in ranked[1]
+
+    top = matcher.batch_match_professors('["Robotics", "AI"]', professors, rerank_top_k=1, top_k=2)
+    assert [p['name'] for p in top] == ['B', 'C']
+
+
+def test_schedule_batch_skips_off_hours():
+    """Test batch scheduling moves sends outside 9 AM - 6 PM to the next window"""
+    scheduler = EmailScheduler()
+
+    evening = scheduler.schedule_batch(3, interval_minutes=2, start_time=datetime(2024, 1, 1, 17, 58))
+    assert evening == [datetime(2024, 1, 1, 17, 58), datetime(2024, 1, 2, 9, 0), datetime(2024, 1, 2, 9, 2)]
+
+    early = scheduler.schedule_batch(2, interval_minutes=2, start_time=datetime(2024, 1, 1, 3, 0))
+    assert early == [datetime(2024, 1, 1, 3, 0), datetime(2024, 1, 1, 9, 0)]
+
+
+def test_smtp_send_many_reuses_connection(monkeypatch):
+    """Test batched sends share one SMTP login (no server needed)"""
+    connections = []
+
+    class FakeSMTP:
+        def __init__(self, host, port):
+            self.sent = []
+            self.closed = False
+            connections.append(self)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.quit()
+
+        def starttls(self):
+            pass
+
+        def login(self, user, password):
+            pass
+
+        def send_message(self, msg):
+            if self.closed:
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            self.sent.append(msg['To'])
+
+        def quit(self):
+            self.closed = True
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(smtp_service.smtplib, 'SMTP', FakeSMTP)
+    smtp = SMTPService('smtp.test', 587, 'me@test.edu', 'secret')
+
+    results = smtp.send_many([
+        ('a@test.edu', 'Subject', 'Body'),
+        ('b@test.edu', 'Subject', 'Body')
+    ])
+
+    assert results == [True, True]
+    assert len(connections) == 1
+    assert connections[0].sent == ['a@test.edu', 'b@test.edu']
+
+    # Nested inside `with smtp:` the connection stays open until the outer block exits
+    with smtp:
+        smtp.send_many([('c@test.edu', 'Subject', 'Body')])
+        assert smtp.send_email('d@test.edu', 'Subject', 'Body')
+        assert not connections[1].closed
+
+        # A dropped connection is reopened once and the message retried
+        connections[1].closed = True
+        assert smtp.send_email('e@test.edu', 'Subject', 'Body')
+
+    assert len(connections) == 3
+    assert connections[1].sent == ['c@test.edu', 'd@test.edu']
+    assert connections[2].sent == ['e@test.edu']
+    assert connections[2].closed
+
+
+def test_smtp_attachment_cached(tmp_path):
+    """Test an attachment is read and encoded once per file version (no server needed)"""
+    cv = tmp_path / 'cv.pdf'
+    cv.write_bytes(b'%PDF-1.4 test')
+    mtime = os.path.getmtime(cv)
+
+    first = smtp_service._load_attachment(str(cv), mtime)
+    assert smtp_service._load_attachment(str(cv), mtime) is first
+    assert first.get_payload(decode=True) == b'%PDF-1.4 test'
+    assert 'cv.pdf' in first['Content-Disposition']
+
+
+def test_professor_scraper_sample_records():
+    """Test synthetic professor generation (no network needed)"""
+    scraper = ProfessorScraper()
+
+    professors = scraper.scrape_professors(university_id=7, university_name='MIT', limit=20)
+
+    assert len(professors) == 20
+    for professor in professors:
+        assert professor['university_id'] == 7
+        assert professor['email'].endswith('@mit.edu')
+        assert professor['department'] in ProfessorScraper.SAMPLE_PROFESSORS['departments']
+        assert 10 <= professor['h_index'] <= 80
+        assert isinstance(professor['accepting_students'], bool)
+
+
+def test_extract_email_from_page_skips_generic():
+    """Test the first non-generic email on a page is returned (no network needed)"""
+    scraper = ProfessorScraper()
+
+    html = '<a href="mailto:info@mit.edu">info</a> <a>jane.doe@mit.edu</a> <a>john@mit.edu</a>'
+    assert scraper.extract_email_from_page(html) == 'jane.doe@mit.edu'
+    assert scraper.extract_email_from_page('<p>Webmaster@mit.edu</p>') is None
+
+
+def test_host_slots_shared_across_scrapers(monkeypatch):
+    """Test request spacing applies per host and across instances (no network needed)"""
+    monkeypatch.setattr(UniversityScraper, '_host_ready', {})
+    first = UniversityScraper(delay_min=2, delay_max=2)
+    second = UniversityScraper(delay_min=2, delay_max=2)
+
+    assert first._reserve_host_slot('https://www.mit.edu/a') == 0.0
+    assert second._reserve_host_slot('https://www.mit.edu/b') == pytest.approx(2, abs=0.1)
+
+    # Other hosts are not delayed
+    assert second._reserve_host_slot('https://www.ox.ac.uk') == 0.0
+
+
+def test_university_details_batch(monkeypatch):
+    """Test batch detail scrapes cap requests per host and keep input order (local stub server)"""
+    monkeypatch.setattr(UniversityScraper, '_host_ready', {})
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, peak
+
+    class UniversityStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.05)
+            body = b'<html><body>University</body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with lock:
+                in_flight[0] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), UniversityStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Closed port for the failing site
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    try:
+        scraper = UniversityScraper(delay_min=0, delay_max=0, timeout=5, max_per_host=2)
+        websites = [f'http://127.0.0.1:{server.server_port}/{i}' for i in range(6)]
+        websites.insert(3, f'http://127.0.0.1:{closed_port}/')
+
+        details = scraper.scrape_university_details_batch(websites)
+
+        statuses = [d['scrape_status'] for d in details]
+        assert statuses == ['completed'] * 3 + ['failed'] + ['completed'] * 3
+        assert details[0]['contact_info'] == UniversityScraper.CONTACT_INFO_JSON
+        assert in_flight[1] == 2
+    finally:
+        server.shutdown()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])